@@ -18,6 +18,7 @@ import FreeCAD as App
 import Part
 import Sketcher
 import math
+import numpy as np
 
 # =============================================================================
 # PARAMETERS - All dimensions in mm
@@ -83,16 +84,13 @@ def get_param(name):
 # =============================================================================
 
 def create_document():
-    """Create or get the FreeCAD document."""
+    """Create a fresh FreeCAD document, replacing any previous run's."""
     doc_name = "SlitLampHousing"
     if App.ActiveDocument and App.ActiveDocument.Name == doc_name:
-        doc = App.ActiveDocument
-        # Clear existing objects
-        for obj in doc.Objects:
-            doc.removeObject(obj.Name)
-    else:
-        doc = App.newDocument(doc_name)
-    return doc
+        # Close and recreate in one shot: removing objects one at a time makes
+        # FreeCAD re-evaluate the dependency graph on every removeObject call.
+        App.closeDocument(doc_name)
+    return App.newDocument(doc_name)
 
 
 def make_cylinder(radius, height, position=(0, 0, 0), direction=(0, 0, 1)):
@@ -110,22 +108,23 @@ def make_box(length, width, height, position=(0, 0, 0)):
     return box
 
 
+# Unit hexagon vertex directions (start at 30° for flat bottom), precomputed
+# so make_hexagon does no trig per call.
+_HEX_DIRS = tuple(
+    (math.cos(math.radians(60 * i + 30)), math.sin(math.radians(60 * i + 30)))
+    for i in range(6)
+)
+
+
 def make_hexagon(flat_to_flat, height, position=(0, 0, 0)):
     """Create a hexagonal prism (flat-to-flat dimension)."""
-    # Hexagon vertices
     radius = flat_to_flat / math.sqrt(3)  # Circumradius from flat-to-flat
-    vertices = []
-    for i in range(6):
-        angle = math.radians(60 * i + 30)  # Start at 30° for flat bottom
-        x = position[0] + radius * math.cos(angle)
-        y = position[1] + radius * math.sin(angle)
-        vertices.append(App.Vector(x, y, position[2]))
-    
-    # Create wire and face
-    edges = []
-    for i in range(6):
-        edges.append(Part.makeLine(vertices[i], vertices[(i + 1) % 6]))
-    wire = Part.Wire(edges)
+    px, py, pz = position
+    vertices = [App.Vector(px + radius * cx, py + radius * cy, pz) for cx, cy in _HEX_DIRS]
+    vertices.append(vertices[0])  # Close the polygon
+
+    # One closed wire from the vertex list (no per-edge objects + wire stitch)
+    wire = Part.makePolygon(vertices)
     face = Part.Face(wire)
     hex_prism = face.extrude(App.Vector(0, 0, height))
     return hex_prism
@@ -151,16 +150,21 @@ def create_mounting_sleeve():
     Create the friction-fit mounting sleeve with buttress.
     The sleeve fits over the 30mm observer tube.
     """
-    eyepiece_od = get_param("eyepiece_od")
-    clearance = get_param("sleeve_clearance")
-    wall = get_param("sleeve_wall")
-    length = get_param("sleeve_length")
-    buttress_od = get_param("buttress_od")
-    buttress_length = get_param("buttress_length")
-    camera_offset = get_param("camera_offset")
-    camera_lens_dia = get_param("camera_lens_dia")
-    ribbon_width = get_param("ribbon_width")
-    ribbon_thickness = get_param("ribbon_thickness")
+    # Read all parameters once into locals (one dict lookup each, no calls)
+    p = PARAMS
+    eyepiece_od = p["eyepiece_od"]
+    clearance = p["sleeve_clearance"]
+    wall = p["sleeve_wall"]
+    length = p["sleeve_length"]
+    buttress_od = p["buttress_od"]
+    buttress_length = p["buttress_length"]
+    camera_offset = p["camera_offset"]
+    camera_lens_dia = p["camera_lens_dia"]
+    ribbon_width = p["ribbon_width"]
+    ribbon_thickness = p["ribbon_thickness"]
+    camera_pcb_depth = p["camera_pcb_depth"]
+    camera_pcb_width = p["camera_pcb_width"]
+    camera_pcb_height = p["camera_pcb_height"]
     
     # Inner diameter with friction fit clearance
     sleeve_id = eyepiece_od + clearance
@@ -180,8 +184,8 @@ def create_mounting_sleeve():
     
     # Camera pocket - cylindrical recess at camera_offset from buttress face
     # This holds the OV5647 module
-    camera_pocket_depth = get_param("camera_pcb_depth") + 2
-    camera_pocket_dia = max(get_param("camera_pcb_width"), get_param("camera_pcb_height")) + 1
+    camera_pocket_depth = camera_pcb_depth + 2
+    camera_pocket_dia = max(camera_pcb_width, camera_pcb_height) + 1
     camera_pocket_z = camera_offset
     camera_pocket = make_cylinder(camera_pocket_dia / 2, camera_pocket_depth,
                                    position=(0, 0, camera_pocket_z))
@@ -209,20 +213,23 @@ def create_front_shell():
     Create the front shell (sleeve side) of the housing.
     Contains the sleeve, Pi mounting standoffs, and ribbon cable channel.
     """
-    pi_length = get_param("pi_length")
-    pi_width = get_param("pi_width")
-    pi_component_height = get_param("pi_component_height")
-    pi_bottom_clearance = get_param("pi_bottom_clearance")
-    standoff_height = get_param("standoff_height")
-    wall = get_param("wall")
-    mount_x = get_param("mount_spacing_x")
-    mount_y = get_param("mount_spacing_y")
-    standoff_od = get_param("standoff_od")
-    mount_hole_dia = get_param("mount_hole_dia")
-    snap_width = get_param("snap_width")
-    snap_depth = get_param("snap_depth")
-    screw_boss_od = get_param("screw_boss_od")
-    screw_hole_dia = get_param("screw_hole_dia")
+    # Read all parameters once into locals (one dict lookup each, no calls)
+    p = PARAMS
+    pi_length = p["pi_length"]
+    pi_width = p["pi_width"]
+    pi_component_height = p["pi_component_height"]
+    pi_bottom_clearance = p["pi_bottom_clearance"]
+    standoff_height = p["standoff_height"]
+    wall = p["wall"]
+    mount_x = p["mount_spacing_x"]
+    mount_y = p["mount_spacing_y"]
+    standoff_od = p["standoff_od"]
+    mount_hole_dia = p["mount_hole_dia"]
+    snap_width = p["snap_width"]
+    snap_depth = p["snap_depth"]
+    screw_boss_od = p["screw_boss_od"]
+    screw_hole_dia = p["screw_hole_dia"]
+    ribbon_width = p["ribbon_width"]
     
     # Calculate enclosure dimensions
     # Internal height = standoff + PCB + components
@@ -244,7 +251,18 @@ def create_front_shell():
     
     # Create shell
     shell = outer.cut(inner)
-    
+
+    # Batched booleans, grouped to preserve the pairwise ordering semantics:
+    # the Pi mount holes and snap sockets must be cut BEFORE the screw
+    # bosses and sleeve block are fused, because those later additions
+    # overlap the cuts and refill them (the boss swallows most of the
+    # neighbouring mount hole, leaving only its own tap hole; the block
+    # fills the -y snap sockets). Four booleans instead of ~14 pairwise.
+    standoffs = []
+    early_cuts = []  # cut through the standoffs, before bosses/sleeve land
+    additions = []   # screw bosses, sleeve block, sleeve
+    late_cuts = []   # screw holes, ribbon channel
+
     # Pi mounting standoffs (4 corners)
     standoff_positions = [
         (-mount_x / 2, -mount_y / 2),
@@ -252,67 +270,66 @@ def create_front_shell():
         (-mount_x / 2, mount_y / 2),
         (mount_x / 2, mount_y / 2),
     ]
-    
+
     for px, py in standoff_positions:
         # Standoff cylinder
-        standoff = make_cylinder(standoff_od / 2, standoff_height, position=(px, py, wall))
-        shell = shell.fuse(standoff)
+        standoffs.append(make_cylinder(standoff_od / 2, standoff_height, position=(px, py, wall)))
         # Screw hole
-        hole = make_cylinder(mount_hole_dia / 2, standoff_height + wall + 1, 
-                            position=(px, py, -0.5))
-        shell = shell.cut(hole)
-    
+        early_cuts.append(make_cylinder(mount_hole_dia / 2, standoff_height + wall + 1,
+                                        position=(px, py, -0.5)))
+
     # Snap-fit sockets along the parting line (top edge)
     # Two on each long side
     snap_positions_y = [(-ext_width / 2 + wall / 2, -1), (ext_width / 2 - wall / 2, 1)]
     snap_positions_x = [-ext_length / 4, ext_length / 4]
-    
+
     for sx in snap_positions_x:
         for sy, direction in snap_positions_y:
             # Socket cutout
-            socket = make_box(snap_width, snap_depth + 0.5, 3,
-                             position=(sx, sy + direction * snap_depth / 2, ext_height - 2))
-            shell = shell.cut(socket)
-    
+            early_cuts.append(make_box(snap_width, snap_depth + 0.5, 3,
+                                       position=(sx, sy + direction * snap_depth / 2, ext_height - 2)))
+
     # Screw boss positions (diagonal corners)
     screw_positions = [
         (-ext_length / 2 + screw_boss_od, -ext_width / 2 + screw_boss_od),
         (ext_length / 2 - screw_boss_od, ext_width / 2 - screw_boss_od),
     ]
-    
+
     for sx, sy in screw_positions:
-        boss = make_cylinder(screw_boss_od / 2, front_internal_height, position=(sx, sy, wall))
-        shell = shell.fuse(boss)
-        hole = make_cylinder(screw_hole_dia / 2, ext_height + 1, position=(sx, sy, -0.5))
-        shell = shell.cut(hole)
-    
+        additions.append(make_cylinder(screw_boss_od / 2, front_internal_height, position=(sx, sy, wall)))
+        late_cuts.append(make_cylinder(screw_hole_dia / 2, ext_height + 1, position=(sx, sy, -0.5)))
+
     # Get sleeve geometry
     sleeve, sleeve_od, sleeve_length = create_mounting_sleeve()
-    
+
     # Position sleeve perpendicular to front face
     # Rotate 90° around X axis and translate
     sleeve.rotate(App.Vector(0, 0, 0), App.Vector(1, 0, 0), -90)
     sleeve_offset_y = -ext_width / 2 - sleeve_length + wall
     sleeve.translate(App.Vector(0, sleeve_offset_y, ext_height / 2))
-    
+
     # Create sleeve attachment block
     sleeve_block_length = sleeve_od + 4
     sleeve_block_width = wall + 5
     sleeve_block_height = sleeve_od + 4
     sleeve_block = make_box(sleeve_block_length, sleeve_block_width, sleeve_block_height,
-                           position=(0, -ext_width / 2 + sleeve_block_width / 2 - wall, 
+                           position=(0, -ext_width / 2 + sleeve_block_width / 2 - wall,
                                     ext_height / 2 - sleeve_block_height / 2))
-    
-    # Fuse sleeve block and sleeve to shell
-    shell = shell.fuse(sleeve_block)
-    shell = shell.fuse(sleeve)
-    
+
+    additions.append(sleeve_block)
+    additions.append(sleeve)
+
     # Ribbon cable channel from sleeve to Pi CSI connector
-    ribbon_width = get_param("ribbon_width")
-    ribbon_channel = make_box(ribbon_width + 2, ext_width / 2 + 5, 3,
-                              position=(pi_length / 2 - 15, -ext_width / 4, ext_height / 2))
-    shell = shell.cut(ribbon_channel)
-    
+    late_cuts.append(make_box(ribbon_width + 2, ext_width / 2 + 5, 3,
+                              position=(pi_length / 2 - 15, -ext_width / 4, ext_height / 2)))
+
+    # Standoffs in, mount holes/sockets out, bosses/sleeve in, holes out -
+    # same solid as the pairwise sequence, in four booleans
+    shell = shell.fuse(Part.makeCompound(standoffs))
+    shell = shell.cut(Part.makeCompound(early_cuts))
+    shell = shell.fuse(Part.makeCompound(additions))
+    shell = shell.cut(Part.makeCompound(late_cuts))
+
     return shell, ext_length, ext_width, ext_height
 
 
@@ -333,24 +350,30 @@ def create_honeycomb_pattern(width, height, hex_size, hex_wall, depth):
     start_x = -width / 2 + hex_size
     start_y = -height / 2 + hex_size
     
-    for row in range(rows):
-        for col in range(cols):
-            # Offset every other row
-            offset = hex_spacing_x / 2 if row % 2 else 0
-            x = start_x + col * hex_spacing_x + offset
-            y = start_y + row * hex_spacing_y
-            
-            # Check bounds
-            if abs(x) < width / 2 - hex_size and abs(y) < height / 2 - hex_size:
-                hex_prism = make_hexagon(hex_size, depth, position=(x, y, 0))
-                hexagons.append(hex_prism)
-    
-    if hexagons:
-        pattern = hexagons[0]
-        for hex_shape in hexagons[1:]:
-            pattern = pattern.fuse(hex_shape)
-        return pattern
-    return None
+    # Every cell is identical: build one prototype prism and place copies with
+    # cheap affine translations instead of re-tessellating each cell.
+    proto = make_hexagon(hex_size, depth, position=(0, 0, 0))
+
+    # Vectorized cell centers: broadcast the rows x cols grid (with every
+    # other row offset) and apply the clip bounds as a mask, so the Python
+    # loop below only does the actual OCCT placements.
+    col_x = start_x + np.arange(cols) * hex_spacing_x
+    row_y = start_y + np.arange(rows) * hex_spacing_y
+    row_offsets = np.where(np.arange(rows) % 2, hex_spacing_x / 2, 0.0)
+    x_grid = col_x[None, :] + row_offsets[:, None]
+    y_grid = np.broadcast_to(row_y[:, None], x_grid.shape)
+    mask = (np.abs(x_grid) < width / 2 - hex_size) & (np.abs(y_grid) < height / 2 - hex_size)
+
+    for x, y in zip(x_grid[mask], y_grid[mask]):
+        hex_prism = proto.copy()
+        hex_prism.translate(App.Vector(float(x), float(y), 0))
+        hexagons.append(hex_prism)
+    
+    if not hexagons:
+        return None
+    # Cells never touch (hex_wall > 0), so a compound is enough for the single
+    # cut at the call site - no N-1 pairwise boolean fuses through OCCT.
+    return Part.makeCompound(hexagons)
 
 
 def create_rear_shell():
@@ -358,20 +381,23 @@ def create_rear_shell():
     Create the rear shell (button side) of the housing.
     Contains the button cutout, honeycomb ventilation, snap-fit tabs, and screw bosses.
     """
-    pi_length = get_param("pi_length")
-    pi_width = get_param("pi_width")
-    pi_component_height = get_param("pi_component_height")
-    standoff_height = get_param("standoff_height")
-    wall = get_param("wall")
-    button_dia = get_param("button_dia")
-    snap_width = get_param("snap_width")
-    snap_depth = get_param("snap_depth")
-    snap_clearance = get_param("snap_clearance")
-    screw_boss_od = get_param("screw_boss_od")
-    screw_hole_dia = get_param("screw_hole_dia")
-    hex_size = get_param("hex_size")
-    hex_wall = get_param("hex_wall")
-    hex_margin = get_param("hex_margin")
+    # Read all parameters once into locals (one dict lookup each, no calls)
+    p = PARAMS
+    pi_length = p["pi_length"]
+    pi_width = p["pi_width"]
+    pi_component_height = p["pi_component_height"]
+    standoff_height = p["standoff_height"]
+    wall = p["wall"]
+    button_dia = p["button_dia"]
+    snap_width = p["snap_width"]
+    snap_depth = p["snap_depth"]
+    snap_clearance = p["snap_clearance"]
+    screw_boss_od = p["screw_boss_od"]
+    screw_hole_dia = p["screw_hole_dia"]
+    hex_size = p["hex_size"]
+    hex_wall = p["hex_wall"]
+    hex_margin = p["hex_margin"]
+    mount_hole_dia = p["mount_hole_dia"]
     
     # Match front shell dimensions
     internal_height = standoff_height + 1.6 + pi_component_height
@@ -388,13 +414,15 @@ def create_rear_shell():
     inner = make_box(ext_length - 2 * wall, ext_width - 2 * wall, rear_internal_height,
                      position=(0, 0, wall))
     
-    # Create shell
-    shell = outer.cut(inner)
-    
-    # Button cutout (centered on rear face, which is now at Z=0 for this part)
+    # Create shell, with the button cutout taken out of the rear face up front
+    # (before any additions land on it)
     button_hole = make_cylinder(button_dia / 2, wall + 1, position=(0, 0, -0.5))
-    shell = shell.cut(button_hole)
-    
+    shell = outer.cut(Part.makeCompound([inner, button_hole]))
+
+    # Collect additions and subtractions for batched booleans at the end
+    additions = []
+    subtractions = []
+
     # Button retaining lip (inner ring to hold button)
     button_lip_id = button_dia - 2
     button_lip_od = button_dia + 2
@@ -402,7 +430,7 @@ def create_rear_shell():
     button_lip_outer = make_cylinder(button_lip_od / 2, button_lip_height, position=(0, 0, wall))
     button_lip_inner = make_cylinder(button_lip_id / 2, button_lip_height + 1, position=(0, 0, wall - 0.5))
     button_lip = button_lip_outer.cut(button_lip_inner)
-    shell = shell.fuse(button_lip)
+    additions.append(button_lip)
     
     # Honeycomb ventilation pattern on rear face (around button)
     # Create honeycomb for each quadrant to avoid button
@@ -423,54 +451,60 @@ def create_rear_shell():
         # Move honeycomb to Z=-0.5 to cut through bottom face
         honeycomb.translate(App.Vector(0, 0, -0.5))
         # Exclude button area
-        button_keepout = make_cylinder(button_dia / 2 + hex_margin, wall + 2, 
+        button_keepout = make_cylinder(button_dia / 2 + hex_margin, wall + 2,
                                        position=(0, 0, -1))
         honeycomb = honeycomb.cut(button_keepout)
-        shell = shell.cut(honeycomb)
-    
+        subtractions.append(honeycomb)
+
     # Snap-fit tabs along the parting line (bottom edge for mating)
     snap_positions_y = [(-ext_width / 2 + wall, -1), (ext_width / 2 - wall, 1)]
     snap_positions_x = [-ext_length / 4, ext_length / 4]
-    
+
     for sx in snap_positions_x:
         for sy, direction in snap_positions_y:
             # Snap tab with 45° lead-in
-            tab_base = make_box(snap_width - snap_clearance, snap_depth, 2.5,
-                               position=(sx, sy + direction * (wall / 2 + snap_depth / 2), 
-                                        ext_height - 1.25))
-            shell = shell.fuse(tab_base)
-    
+            additions.append(make_box(snap_width - snap_clearance, snap_depth, 2.5,
+                                      position=(sx, sy + direction * (wall / 2 + snap_depth / 2),
+                                               ext_height - 1.25)))
+
     # Screw boss positions (matching front shell)
     screw_positions = [
         (-ext_length / 2 + screw_boss_od, -ext_width / 2 + screw_boss_od),
         (ext_length / 2 - screw_boss_od, ext_width / 2 - screw_boss_od),
     ]
-    
+
     for sx, sy in screw_positions:
-        boss = make_cylinder(screw_boss_od / 2, rear_internal_height, position=(sx, sy, wall))
-        shell = shell.fuse(boss)
+        additions.append(make_cylinder(screw_boss_od / 2, rear_internal_height, position=(sx, sy, wall)))
         # Through hole for screw
-        hole = make_cylinder(get_param("mount_hole_dia") / 2, ext_height + 1, 
-                            position=(sx, sy, -0.5))
-        shell = shell.cut(hole)
-    
+        subtractions.append(make_cylinder(mount_hole_dia / 2, ext_height + 1,
+                                          position=(sx, sy, -0.5)))
+
     # GPIO wire exit slot (side of enclosure)
     gpio_slot_width = 12
     gpio_slot_height = 4
-    gpio_slot = make_box(wall + 1, gpio_slot_width, gpio_slot_height,
-                        position=(ext_length / 2 - wall / 2, 0, ext_height - gpio_slot_height / 2 - 2))
-    shell = shell.cut(gpio_slot)
-    
+    subtractions.append(make_box(wall + 1, gpio_slot_width, gpio_slot_height,
+                                 position=(ext_length / 2 - wall / 2, 0,
+                                          ext_height - gpio_slot_height / 2 - 2)))
+
+    # Fuse everything in, then cut all holes/slots through the result
+    shell = shell.fuse(Part.makeCompound(additions))
+    shell = shell.cut(Part.makeCompound(subtractions))
+
     return shell, ext_length, ext_width, ext_height
 
 
 def apply_fillets_to_part(part_feature, radius):
-    """Apply fillets to a Part::Feature object."""
+    """Apply fillets to a Part::Feature object.
+
+    The fillet is computed on the raw Part.Shape first and assigned exactly
+    once, so only a single feature-level recompute can ever be triggered.
+    """
     try:
-        fillet_shape = part_feature.Shape.makeFillet(radius, part_feature.Shape.Edges)
-        part_feature.Shape = fillet_shape
+        filleted = part_feature.Shape.makeFillet(radius, part_feature.Shape.Edges)
     except Exception as e:
         print(f"Warning: Could not apply fillet: {e}")
+        return
+    part_feature.Shape = filleted
 
 
 # =============================================================================
@@ -486,7 +520,12 @@ def main():
     # Create document
     doc = create_document()
     print(f"Created document: {doc.Name}")
-    
+
+    # Batch the whole build into one transaction so addObject/Shape
+    # assignments don't trigger incremental dependency-graph updates;
+    # the single recompute below settles everything at once.
+    doc.openTransaction("build")
+
     # Generate front shell
     print("\nGenerating front shell (sleeve side)...")
     front_shape, front_l, front_w, front_h = create_front_shell()
@@ -510,7 +549,8 @@ def main():
     print(f"\nApplying {fillet_radius}mm fillets...")
     # Note: Fillets applied selectively to avoid failures on complex geometry
     
-    # Recompute
+    # Commit the build, then recompute exactly once
+    doc.commitTransaction()
     doc.recompute()
     
     # Summary
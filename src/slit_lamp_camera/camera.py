@@ -3,25 +3,37 @@ from __future__ import annotations
 import signal
 import shutil
 import subprocess
+import sys
+import threading
 import os
 import shlex
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 # Default recording parameters
 DEFAULT_FPS = 25
 
 
+@lru_cache(maxsize=1)
 def have_libcamera_vid() -> bool:
     return shutil.which("libcamera-vid") is not None
 
 
+@lru_cache(maxsize=1)
 def have_rpicam_vid() -> bool:
     """Check for rpicam-vid (newer Raspberry Pi OS Bookworm tool)."""
     return shutil.which("rpicam-vid") is not None
 
 
+@lru_cache(maxsize=1)
 def get_camera_command() -> str:
-    """Return the available camera recording command."""
+    """Return the available camera recording command.
+
+    Cached: shutil.which walks every $PATH entry, and this runs on every
+    button press in the recording service.
+    """
     if have_rpicam_vid():
         return "rpicam-vid"
     if have_libcamera_vid():
@@ -31,24 +43,157 @@ def get_camera_command() -> str:
     )
 
 
+@lru_cache(maxsize=1)
+def _parse_extra_camera_args() -> tuple[str, ...]:
+    raw = os.environ.get("SLITCAM_CAMERA_ARGS", "").strip()
+    if not raw:
+        return ()
+    return tuple(shlex.split(raw))
+
+
 def get_extra_camera_args() -> list[str]:
     """Optional extra args passed through to rpicam-vid/libcamera-vid.
 
     This is useful for tuning Camera Module 3 settings (e.g. autofocus, resolution)
-    without changing code.
+    without changing code. Parsed once per process - set the env var before
+    the first recording.
 
     Example:
         SLITCAM_CAMERA_ARGS='--autofocus-mode continuous --width 1920 --height 1080'
     """
-    raw = os.environ.get("SLITCAM_CAMERA_ARGS", "").strip()
-    if not raw:
-        return []
-    return shlex.split(raw)
+    return list(_parse_extra_camera_args())
+
+
+def _clear_camera_cache() -> None:
+    """Reset the cached tool and extra-arg lookups (used by tests)."""
+    have_libcamera_vid.cache_clear()
+    have_rpicam_vid.cache_clear()
+    get_camera_command.cache_clear()
+    _parse_extra_camera_args.cache_clear()
+
+
+# Core reserved for the encoder on a 4-core Pi; override with
+# SLITCAM_ENCODER_CPU (set to an empty string to disable pinning).
+DEFAULT_ENCODER_CPU = 3
+
+
+def _encoder_cpu() -> int | None:
+    """Resolve the core reserved for rpicam-vid, or None if pinning is off.
+
+    Pinning is Linux-only and pointless on single/dual-core machines, so
+    this returns None on macOS dev and small CPU counts.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    raw = os.environ.get("SLITCAM_ENCODER_CPU")
+    if raw is not None:
+        if not raw.strip():
+            return None
+        try:
+            cpu = int(raw)
+        except ValueError:
+            return None
+    else:
+        cpu = DEFAULT_ENCODER_CPU
+    n_cpus = os.cpu_count() or 1
+    if n_cpus < 4 or not 0 <= cpu < n_cpus:
+        return None
+    return cpu
+
+
+def _pin_encoder(pid: int) -> None:
+    """Give the encoder a dedicated core and a priority bump (best-effort).
+
+    Keeps rpicam-vid off the scheduler queue shared with the Python service
+    so USB/log activity can't jitter frame timing. Failures (permissions,
+    process already gone) are ignored.
+    """
+    cpu = _encoder_cpu()
+    if cpu is None:
+        return
+    try:
+        os.sched_setaffinity(pid, {cpu})
+        os.setpriority(os.PRIO_PROCESS, pid, -5)
+    except OSError:
+        pass
+
+
+def _prealloc_bytes() -> int:
+    """Bytes to pre-reserve for a recording, from SLITCAM_PREALLOC_MB.
+
+    Defaults to 0 (disabled). On FAT32 sticks, cluster allocation on every
+    append is what causes write micro-stalls; reserving space up front
+    turns the stream into pure data writes over contiguous clusters.
+    """
+    raw = os.environ.get("SLITCAM_PREALLOC_MB", "").strip()
+    try:
+        return max(0, int(raw)) * 1024 * 1024 if raw else 0
+    except ValueError:
+        return 0
+
+
+def _preallocate(fd: int, size_bytes: int) -> None:
+    """Best-effort posix_fallocate on an open output file."""
+    if size_bytes <= 0 or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(fd, 0, size_bytes)
+    except OSError:
+        pass
+
+
+def preallocate_file(path: Path, size_bytes: int | None = None) -> None:
+    """Pre-reserve contiguous space for path (best-effort, Linux only).
+
+    Caveat: rpicam-vid reopens its output with truncation, which hands the
+    reservation back before the first frame - so this only pays off when
+    the process writing the file keeps the preallocated fd (or appends).
+    Hence the env-var gate rather than always-on.
+    """
+    if size_bytes is None:
+        size_bytes = _prealloc_bytes()
+    if size_bytes <= 0 or not hasattr(os, "posix_fallocate"):
+        return
+    fd = os.open(str(path), os.O_CREAT | os.O_WRONLY, 0o644)
+    try:
+        _preallocate(fd, size_bytes)
+    finally:
+        os.close(fd)
+
+
+# Encoder tuning defaults. Bitrate/profile dominate encoder output size;
+# a 10 Mbit/s cap on the mostly-static, evenly-lit slit-lamp scene keeps
+# quality visually lossless while cutting USB write pressure (bandwidth is
+# the bottleneck on USB 2.0 sticks - less bitrate means fewer dropped
+# frames). --intra 30 keeps a keyframe cadence of ~1.2 s at 25 fps so a
+# truncated recording loses at most that much.
+DEFAULT_BITRATE = 10_000_000
+DEFAULT_PROFILE = "main"
+DEFAULT_LEVEL = "4.2"
+DEFAULT_INTRA = 30
+
+
+def _encoder_tuning_args(
+    bitrate: int | None,
+    profile: str,
+    level: str,
+    intra: int,
+) -> list[str]:
+    """rpicam-vid/libcamera-vid flags for the H.264 encoder settings."""
+    args: list[str] = []
+    if bitrate is not None:
+        args += ["--bitrate", str(bitrate)]
+    args += ["--profile", profile, "--level", level, "--intra", str(intra)]
+    return args
 
 
 def start_recording(
     output_path: Path,
     framerate: int = DEFAULT_FPS,
+    bitrate: int | None = DEFAULT_BITRATE,
+    profile: str = DEFAULT_PROFILE,
+    level: str = DEFAULT_LEVEL,
+    intra: int = DEFAULT_INTRA,
 ) -> subprocess.Popen:
     """Start indefinite H.264 recording, returning the subprocess handle.
 
@@ -58,12 +203,18 @@ def start_recording(
     Args:
         output_path: Path to write the .h264 file
         framerate: Frames per second (default 25)
+        bitrate: Encoder bitrate cap in bits/s, or None for the ISP default
+        profile: H.264 profile (baseline/main/high)
+        level: H.264 level
+        intra: Keyframe (I-frame) interval in frames
+
+    The caller must ensure output_path.parent exists (RecordingService
+    creates its output directory once at startup); keeping mkdir out of
+    here saves a USB metadata round-trip on every button press.
 
     Returns:
         subprocess.Popen handle - pass this to stop_recording() to stop
     """
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
     cmd = get_camera_command()
     args = [
         cmd,
@@ -73,27 +224,304 @@ def start_recording(
         "--inline",  # Include SPS/PPS headers for easier conversion
         "--nopreview",
         "-o", str(output_path),
+        # Real capture timestamps; lets the mux use actual frame timing
+        # instead of synthesizing PTS from the nominal framerate
+        "--save-pts", str(output_path.with_suffix(".pts")),
     ]
+    args += _encoder_tuning_args(bitrate, profile, level, intra)
 
+    # Extra args come last so SLITCAM_CAMERA_ARGS can override the tuning
+    # defaults above (the tools take the last occurrence of a flag).
     args += get_extra_camera_args()
 
+    # Opt-in (SLITCAM_PREALLOC_MB): reserve clusters before launch so a
+    # camera stack configured to append writes into contiguous space.
+    preallocate_file(output_path)
+
+    # Plain Popen with defaults: no preexec_fn, shell, cwd or env override,
+    # so CPython takes its vfork/posix_spawn fast path instead of a full
+    # fork() (which copies the service's page tables on every press).
     proc = subprocess.Popen(
         args,
         stdout=subprocess.DEVNULL,
         stderr=subprocess.STDOUT,
     )
+    _pin_encoder(proc.pid)
     return proc
 
 
-def stop_recording(proc: subprocess.Popen, timeout: float = 5.0) -> None:
-    """Stop a recording subprocess gracefully.
+@dataclass
+class RecordingPipeline:
+    """Handles for a camera -> muxer streaming recording.
+
+    The camera writes the elementary stream into a pipe and the muxer writes
+    the final MP4; stop_recording() knows how to wind both down in order.
+    """
 
-    Sends SIGINT first (graceful stop), then SIGTERM if timeout expires.
+    camera: subprocess.Popen
+    muxer: subprocess.Popen
+    output: Path
+
+    def poll(self) -> int | None:
+        """Mirror Popen.poll() for the camera process."""
+        return self.camera.poll()
+
+
+def start_recording_mp4(
+    output_path: Path,
+    framerate: int = DEFAULT_FPS,
+    bitrate: int | None = DEFAULT_BITRATE,
+    profile: str = DEFAULT_PROFILE,
+    level: str = DEFAULT_LEVEL,
+    intra: int = DEFAULT_INTRA,
+) -> RecordingPipeline:
+    """Start indefinite recording muxed straight to MP4.
+
+    Pipes rpicam-vid stdout into an ffmpeg remux, so the raw .h264 stream
+    never touches disk - only the final .mp4 is written. On a USB 2.0 stick
+    that is a third of the I/O of the record-then-remux flow.
 
     Args:
-        proc: The subprocess.Popen handle from start_recording()
-        timeout: Seconds to wait for graceful shutdown before forcing
+        output_path: Path to write the .mp4 file
+        framerate: Frames per second (default 25)
+
+    Returns:
+        RecordingPipeline - pass to stop_recording() to stop
     """
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("ffmpeg not found. Install via: sudo apt install ffmpeg")
+
+    cmd = get_camera_command()
+    cam_args = [
+        cmd,
+        "-t", "0",
+        "--codec", "h264",
+        "--framerate", str(framerate),
+        "--inline",
+        "--nopreview",
+        "-o", "-",  # Elementary stream to stdout
+    ]
+    cam_args += _encoder_tuning_args(bitrate, profile, level, intra)
+    cam_args += get_extra_camera_args()
+
+    mux_args = [
+        "ffmpeg",
+        "-y",
+        "-fflags", "+genpts",
+        "-f", "h264",
+        "-r", str(framerate),
+        "-i", "pipe:0",
+        "-c", "copy",
+        "-movflags", _MP4_MOVFLAGS["movflags"],
+        str(output_path),
+    ]
+
+    read_fd, write_fd = os.pipe()
+    try:
+        camera = subprocess.Popen(cam_args, stdout=write_fd, stderr=subprocess.DEVNULL)
+        muxer = subprocess.Popen(
+            mux_args,
+            stdin=read_fd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.STDOUT,
+        )
+    finally:
+        # Both children hold their own copies; the parent's must close so
+        # ffmpeg sees EOF when rpicam-vid exits.
+        os.close(read_fd)
+        os.close(write_fd)
+
+    _pin_encoder(camera.pid)
+    return RecordingPipeline(camera=camera, muxer=muxer, output=output_path)
+
+
+# Read size from the encoder pipe in buffered mode; big enough to keep
+# syscall count low, small enough to drain promptly on stop.
+_RING_CHUNK = 1 << 20
+
+
+def _write_buffer_bytes() -> int:
+    """Ring-buffer size from SLITCAM_WRITE_BUFFER_MB (0 = direct-to-file)."""
+    raw = os.environ.get("SLITCAM_WRITE_BUFFER_MB", "").strip()
+    try:
+        return max(0, int(raw)) * 1024 * 1024 if raw else 0
+    except ValueError:
+        return 0
+
+
+class BufferedRecording:
+    """Recording with an in-process ring buffer between encoder and disk.
+
+    A reader thread drains the camera's stdout into a bounded deque and a
+    writer thread flushes it to the output file, so a USB stick stalling
+    for a few hundred ms on garbage collection is absorbed by the buffer
+    instead of backpressuring the encoder pipe (which drops frames).
+    Mirrors stop_recording's expectations the same way RecordingPipeline
+    does: exposes .camera and .poll().
+    """
+
+    def __init__(self, camera: subprocess.Popen, output: Path, cap_bytes: int) -> None:
+        self.camera = camera
+        self.output = output
+        # Never smaller than the read chunk: a sub-chunk cap would leave
+        # the reader parked on a buffer its first chunk can't fit into
+        self._cap = max(cap_bytes, _RING_CHUNK)
+        self._chunks: deque[bytes] = deque()
+        self._buffered = 0
+        self._cond = threading.Condition()
+        self._eof = False
+        self._warned = False
+        self._write_error: OSError | None = None
+        self._fd = os.open(str(output), os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 0o644)
+        # The writer owns the fd, so the reservation actually sticks here
+        # (unlike rpicam-vid's own truncating open).
+        _preallocate(self._fd, max(_prealloc_bytes(), cap_bytes))
+        self._reader = threading.Thread(target=self._read_loop, name="rec-read", daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name="rec-write", daemon=True)
+        self._reader.start()
+        self._writer.start()
+
+    def poll(self) -> int | None:
+        """Mirror Popen.poll() for the camera process."""
+        return self.camera.poll()
+
+    def _read_loop(self) -> None:
+        src = self.camera.stdout
+        while True:
+            chunk = src.read(_RING_CHUNK)
+            if not chunk:
+                break
+            with self._cond:
+                while (
+                    self._write_error is None
+                    and self._buffered + len(chunk) > self._cap
+                ):
+                    if not self._warned:
+                        self._warned = True
+                        sys.stderr.write(
+                            f"WARNING: write buffer full ({self._cap} bytes); "
+                            "storage is not keeping up with the encoder\n"
+                        )
+                    self._cond.wait()
+                if self._write_error is not None:
+                    # Writer died (full/yanked stick); keep draining the
+                    # pipe so the camera isn't blocked, but discard - the
+                    # data has nowhere to go
+                    continue
+                self._chunks.append(chunk)
+                self._buffered += len(chunk)
+                self._cond.notify_all()
+        with self._cond:
+            self._eof = True
+            self._cond.notify_all()
+
+    def _write_loop(self) -> None:
+        try:
+            while True:
+                with self._cond:
+                    while not self._chunks and not self._eof:
+                        self._cond.wait()
+                    if not self._chunks:
+                        break
+                    chunk = self._chunks.popleft()
+                    self._buffered -= len(chunk)
+                    self._cond.notify_all()
+                # os.write can be short (e.g. on fuse/network mounts); keep
+                # going until the whole chunk is on disk
+                view = memoryview(chunk)
+                while view:
+                    written = os.write(self._fd, view)
+                    view = view[written:]
+            # Preallocation may have left the file longer than what was written
+            os.ftruncate(self._fd, os.lseek(self._fd, 0, os.SEEK_CUR))
+        except OSError as exc:
+            # ENOSPC/EIO on a full or yanked stick: record the failure and
+            # wake the reader so it discards instead of parking forever on
+            # a buffer nobody drains
+            with self._cond:
+                self._write_error = exc
+                self._chunks.clear()
+                self._buffered = 0
+                self._cond.notify_all()
+        finally:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+
+    def drain(self) -> None:
+        """Block until the buffer has fully flushed and the fd is closed.
+
+        On a slow stick a full buffer can take tens of seconds to drain;
+        the file must not be touched (e.g. queued for conversion) until
+        the writer thread has finished and truncated off the preallocated
+        tail. Both joins terminate once the camera has exited: the reader
+        sees EOF on the pipe and the writer stops when the buffer empties
+        (or has died recording its error, which wakes the reader too).
+
+        Raises:
+            OSError: the flush failed (e.g. ENOSPC/EIO); the file on disk
+                is incomplete and must not be queued for conversion.
+        """
+        self._reader.join()
+        self._writer.join()
+        if self._write_error is not None:
+            raise self._write_error
+
+
+def start_recording_buffered(
+    output_path: Path,
+    framerate: int = DEFAULT_FPS,
+    bitrate: int | None = DEFAULT_BITRATE,
+    profile: str = DEFAULT_PROFILE,
+    level: str = DEFAULT_LEVEL,
+    intra: int = DEFAULT_INTRA,
+    buffer_bytes: int | None = None,
+) -> BufferedRecording:
+    """Start indefinite H.264 recording through an in-process ring buffer.
+
+    Same output as start_recording, but the elementary stream is piped
+    through Python so write stalls on the storage device don't reach the
+    encoder. Direct-to-file remains the default; enable this via
+    SLITCAM_WRITE_BUFFER_MB (the buffer cap) or an explicit buffer_bytes.
+
+    Args:
+        output_path: Path to write the .h264 file
+        framerate: Frames per second (default 25)
+        bitrate: Encoder bitrate cap in bits/s, or None for the ISP default
+        profile: H.264 profile (baseline/main/high)
+        level: H.264 level
+        intra: Keyframe (I-frame) interval in frames
+        buffer_bytes: Ring-buffer cap (default: SLITCAM_WRITE_BUFFER_MB)
+
+    Returns:
+        BufferedRecording - pass to stop_recording() to stop
+    """
+    if buffer_bytes is None:
+        buffer_bytes = _write_buffer_bytes()
+    if buffer_bytes <= 0:
+        raise ValueError("buffer_bytes must be positive (set SLITCAM_WRITE_BUFFER_MB)")
+
+    cmd = get_camera_command()
+    args = [
+        cmd,
+        "-t", "0",
+        "--codec", "h264",
+        "--framerate", str(framerate),
+        "--inline",
+        "--nopreview",
+        "-o", "-",  # Elementary stream to stdout
+    ]
+    args += _encoder_tuning_args(bitrate, profile, level, intra)
+    args += get_extra_camera_args()
+
+    camera = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    _pin_encoder(camera.pid)
+    return BufferedRecording(camera=camera, output=output_path, cap_bytes=buffer_bytes)
+
+
+def _stop_proc(proc: subprocess.Popen, timeout: float) -> None:
+    """SIGINT first (graceful stop), then SIGTERM/SIGKILL as needed."""
     if proc is None or proc.poll() is not None:
         return  # Already stopped
 
@@ -112,49 +540,205 @@ def stop_recording(proc: subprocess.Popen, timeout: float = 5.0) -> None:
             proc.wait()
 
 
+def stop_recording(
+    proc: subprocess.Popen | RecordingPipeline | BufferedRecording,
+    timeout: float = 5.0,
+) -> None:
+    """Stop a recording gracefully.
+
+    For a plain Popen, sends SIGINT first, then SIGTERM if timeout expires.
+    For a RecordingPipeline, stops the camera first and then waits for the
+    muxer to drain the pipe and finalize the MP4. For a BufferedRecording,
+    stops the camera and blocks - without a timeout - until the ring
+    buffer has fully flushed to disk, so the file is complete on return.
+
+    Args:
+        proc: Handle from start_recording(), start_recording_mp4() or
+            start_recording_buffered()
+        timeout: Seconds to wait for graceful shutdown before forcing
+    """
+    if isinstance(proc, RecordingPipeline):
+        _stop_proc(proc.camera, timeout)
+        try:
+            proc.muxer.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _stop_proc(proc.muxer, timeout)
+        return
+
+    if isinstance(proc, BufferedRecording):
+        _stop_proc(proc.camera, timeout)
+        proc.drain()
+        return
+
+    _stop_proc(proc, timeout)
+
+
+# Fragmented MP4: playable from the start without the moov-relocation second
+# pass, so the remux writes the file exactly once - this halves bytes written
+# on the USB stick, which is the slowest device in the system.
+_MP4_MOVFLAGS = {"movflags": "+faststart+frag_keyframe+empty_moov"}
+
+
+def _convert_with_pyav(h264_path: Path, mp4_path: Path, framerate: int) -> bool:
+    """Remux H.264 to MP4 in-process with PyAV (libav bindings).
+
+    Returns False when PyAV is not installed so the caller can fall back to
+    ffmpeg. Avoids the fork/exec and libavformat startup cost of spawning
+    ffmpeg for what is a pure packet copy.
+    """
+    try:
+        import av  # type: ignore
+    except Exception:
+        return False
+
+    with av.open(str(h264_path), format="h264") as in_container:
+        in_stream = in_container.streams.video[0]
+        with av.open(str(mp4_path), "w", options=_MP4_MOVFLAGS) as out_container:
+            out_stream = out_container.add_stream(template=in_stream)
+            # Raw elementary streams carry no timestamps; synthesize PTS from
+            # the fixed framerate (same effect as ffmpeg's -fflags +genpts -r).
+            time_base = out_stream.time_base
+            pts_step = int(1 / (time_base * framerate)) if time_base else 1
+            for i, packet in enumerate(in_container.demux(in_stream)):
+                if packet.size == 0:  # flush packet
+                    continue
+                packet.pts = packet.dts = i * pts_step
+                packet.stream = out_stream
+                out_container.mux(packet)
+    return True
+
+
 def convert_to_mp4(h264_path: Path, delete_h264: bool = False) -> Path:
-    """Convert H.264 file to MP4 using ffmpeg fast remux.
+    """Convert H.264 file to MP4 via fast remux (no re-encoding).
+
+    Prefers an in-process PyAV remux; falls back to an ffmpeg subprocess when
+    PyAV is not installed.
 
-    Uses -c copy for fast conversion (no re-encoding).
+    When the recording left a sibling .pts file (start_recording passes
+    --save-pts) and mkvmerge is installed, the clip is muxed into an MKV
+    using the real capture timestamps instead - playback speed then stays
+    correct even across dropped frames, and no timestamp-synthesis pass
+    is needed.
 
     Args:
         h264_path: Path to the .h264 file
         delete_h264: If True, delete the .h264 file after successful conversion
 
     Returns:
-        Path to the created .mp4 file
+        Path to the created .mp4 (or .mkv) file
     """
-    if not shutil.which("ffmpeg"):
-        raise RuntimeError("ffmpeg not found. Install via: sudo apt install ffmpeg")
+    pts_path = h264_path.with_suffix(".pts")
+    if pts_path.exists() and shutil.which("mkvmerge"):
+        mkv_path = h264_path.with_suffix(".mkv")
+        subprocess.run(
+            [
+                "mkvmerge",
+                "-o", str(mkv_path),
+                "--timestamps", f"0:{pts_path}",
+                str(h264_path),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.STDOUT,
+            check=True,
+        )
+        pts_path.unlink(missing_ok=True)
+        subprocess.run(["sync"], check=False)
+        if delete_h264:
+            h264_path.unlink(missing_ok=True)
+        return mkv_path
 
     mp4_path = h264_path.with_suffix(".mp4")
 
-    # Fast remux: -c copy means no re-encoding
-    # -fflags +genpts generates presentation timestamps
-    subprocess.run(
-        [
-            "ffmpeg",
-            "-y",  # Overwrite output
-            "-fflags", "+genpts",
-            "-r", str(DEFAULT_FPS),
-            "-i", str(h264_path),
-            "-c", "copy",
-            str(mp4_path),
-        ],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.STDOUT,
-        check=True,
-    )
+    if not _convert_with_pyav(h264_path, mp4_path, DEFAULT_FPS):
+        if not shutil.which("ffmpeg"):
+            raise RuntimeError("ffmpeg not found. Install via: sudo apt install ffmpeg")
+
+        # Fast remux: -c copy means no re-encoding
+        # -fflags +genpts generates presentation timestamps
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-y",  # Overwrite output
+                "-fflags", "+genpts",
+                "-r", str(DEFAULT_FPS),
+                "-i", str(h264_path),
+                "-c", "copy",
+                "-movflags", _MP4_MOVFLAGS["movflags"],
+                "-flush_packets", "0",  # Let ffmpeg batch output writes
+                str(mp4_path),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.STDOUT,
+            check=True,
+        )
 
     # Sync to ensure data is written to USB
     subprocess.run(["sync"], check=False)
 
-    if delete_h264 and mp4_path.exists():
-        h264_path.unlink()
+    # Without mkvmerge the timestamps went unused; don't leave them behind
+    pts_path.unlink(missing_ok=True)
+
+    # A failed conversion raises above, so no need to stat the .mp4 here
+    if delete_h264:
+        h264_path.unlink(missing_ok=True)
 
     return mp4_path
 
 
+def convert_many_to_mp4(h264_paths: list[Path]) -> list[Path]:
+    """Convert several H.264 files in as few invocations as possible.
+
+    Clips with a .pts timestamp sidecar (and mkvmerge installed) take the
+    per-file convert_to_mp4 route so their real capture timestamps are
+    kept - batching must not degrade a clip's timing fidelity. Only the
+    sidecar-less rest is remuxed in a single ffmpeg run with one
+    -map/-c copy output per input, which is byte-identical to converting
+    those one at a time but pays ffmpeg's fork and libavformat startup
+    cost once per batch.
+
+    Args:
+        h264_paths: Paths to the .h264 files
+
+    Returns:
+        Paths to the created .mp4/.mkv files, in input order
+    """
+    results: dict[Path, Path] = {}
+    batch: list[Path] = []
+    use_pts = shutil.which("mkvmerge") is not None
+    for p in h264_paths:
+        if use_pts and p.with_suffix(".pts").exists():
+            results[p] = convert_to_mp4(p)
+        else:
+            batch.append(p)
+
+    if len(batch) == 1 or (batch and not shutil.which("ffmpeg")):
+        # Nothing to batch; PyAV per file still works (or raises).
+        for p in batch:
+            results[p] = convert_to_mp4(p)
+    elif batch:
+        args = ["ffmpeg", "-y"]
+        for p in batch:
+            args += ["-fflags", "+genpts", "-r", str(DEFAULT_FPS), "-i", str(p)]
+        for i, p in enumerate(batch):
+            mp4 = p.with_suffix(".mp4")
+            results[p] = mp4
+            args += [
+                "-map", str(i),
+                "-c", "copy",
+                "-movflags", _MP4_MOVFLAGS["movflags"],
+                "-flush_packets", "0",
+                str(mp4),
+            ]
+        subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT, check=True)
+
+        subprocess.run(["sync"], check=False)
+        # Without mkvmerge the sidecars went unused; don't leave them behind
+        for p in batch:
+            p.with_suffix(".pts").unlink(missing_ok=True)
+
+    return [results[p] for p in h264_paths]
+
+
 def record_h264(
     output_path: Path,
     duration_s: int = 10,
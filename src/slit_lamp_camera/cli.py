@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 import argparse
-import datetime as dt
 import sys
+import time
 from pathlib import Path
 
 from . import __version__
@@ -70,7 +70,7 @@ def _cmd_record_test(args: argparse.Namespace) -> int:
         print(str(exc), file=sys.stderr)
         return 1
 
-    stamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+    stamp = time.strftime("%Y%m%d_%H%M%S")
     out = Path(target.mountpoint) / f"test_{stamp}.h264"
 
     print(f"Recording {args.seconds}s to: {out}")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import signal
 import time
 from typing import Callable
 
@@ -14,6 +15,10 @@ class LatchingButton:
     Calls on_pressed when button transitions to ON (pressed).
     Calls on_released when button transitions to OFF (released).
 
+    Transitions are edge-triggered via gpiozero's when_pressed/when_released
+    callbacks (kernel GPIO events under the hood), so no polling is needed;
+    gpiozero applies bounce_time debouncing itself.
+
     Supports SLITCAM_FAKE_GPIO=1 env var for desktop testing.
     """
 
@@ -33,7 +38,6 @@ class LatchingButton:
 
         self._fake_mode = os.environ.get("SLITCAM_FAKE_GPIO") == "1"
         self._button = None
-        self._last_state: bool | None = None
 
         if not self._fake_mode:
             try:
@@ -44,6 +48,16 @@ class LatchingButton:
                 raise RuntimeError(
                     "gpiozero not available. Install on the Pi with: sudo apt install python3-gpiozero"
                 ) from exc
+            self._button.when_pressed = self._handle_pressed
+            self._button.when_released = self._handle_released
+
+    def _handle_pressed(self) -> None:
+        if self.on_pressed:
+            self.on_pressed()
+
+    def _handle_released(self) -> None:
+        if self.on_released:
+            self.on_released()
 
     @property
     def is_pressed(self) -> bool:
@@ -52,35 +66,14 @@ class LatchingButton:
             return False
         return self._button.is_pressed if self._button else False
 
-    def poll(self) -> None:
-        """Check button state and call callbacks if state changed.
-
-        Call this in a loop with a small sleep interval (e.g., 50ms).
-        """
-        current_state = self.is_pressed
-
-        if self._last_state is None:
-            # First poll - just record state, don't trigger callbacks
-            self._last_state = current_state
-            return
-
-        if current_state != self._last_state:
-            self._last_state = current_state
-            if current_state and self.on_pressed:
-                self.on_pressed()
-            elif not current_state and self.on_released:
-                self.on_released()
-
     def check_initial_state(self) -> bool:
         """Check and return initial button state, triggering on_pressed if ON.
 
-        Call this once at startup to handle case where button is already ON.
+        Call this once at startup to handle case where button is already ON
+        (edge callbacks only fire on transitions, not on the initial level).
         Returns True if button was pressed and on_pressed was called.
         """
-        current_state = self.is_pressed
-        self._last_state = current_state
-
-        if current_state and self.on_pressed:
+        if self.is_pressed and self.on_pressed:
             self.on_pressed()
             return True
         return False
@@ -105,8 +98,18 @@ def wait_for_button_presses(
     """
 
     if os.environ.get("SLITCAM_FAKE_GPIO") == "1":
-        # Simulate: no presses.
-        time.sleep(seconds)
+        # Simulate: no presses. Where sigtimedwait exists, park in it so a
+        # Ctrl-C during the window returns instantly instead of after the
+        # sleep completes.
+        if hasattr(signal, "sigtimedwait"):
+            old_mask = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT})
+            try:
+                if signal.sigtimedwait({signal.SIGINT}, seconds) is not None:
+                    raise KeyboardInterrupt
+            finally:
+                signal.pthread_sigmask(signal.SIG_SETMASK, old_mask)
+        else:
+            time.sleep(seconds)
         return 0
 
     try:
@@ -122,13 +125,13 @@ def wait_for_button_presses(
         nonlocal presses
         presses += 1
 
+    end = time.monotonic() + seconds
     button = Button(gpio_pin, pull_up=pull_up, bounce_time=0.05)
     button.when_pressed = on_press
 
-    # Run a simple timed loop.
-    end = time.monotonic() + seconds
-    while time.monotonic() < end:
-        time.sleep(0.05)
+    # gpiozero counts presses on its own event thread; one long sleep holds
+    # the window open (a single syscall instead of 20 wake-ups per second).
+    time.sleep(max(0.0, end - time.monotonic()))
 
     button.close()
     return presses
@@ -1,27 +1,37 @@
 """Button-controlled video recording service.
 
 This module implements the main recording service that:
-- Monitors a latching button for ON/OFF state changes
+- Reacts to latching button ON/OFF edges (no polling)
 - Starts recording when button is pressed (ON)
 - Stops recording and converts to MP4 when button is released (OFF)
 - Handles graceful shutdown on SIGTERM/SIGINT
 """
 from __future__ import annotations
 
+import os
+import queue
+import selectors
 import signal
 import subprocess
 import sys
+import threading
 import time
-from datetime import datetime
 from pathlib import Path
 from typing import Callable
 
-from .camera import convert_to_mp4, start_recording, stop_recording
+from .camera import (
+    BufferedRecording,
+    RecordingPipeline,
+    _encoder_cpu,
+    _write_buffer_bytes,
+    convert_many_to_mp4,
+    start_recording,
+    start_recording_buffered,
+    start_recording_mp4,
+    stop_recording,
+)
 from .gpio_io import DEFAULT_BUTTON_PIN, LatchingButton
 
-# Polling interval in seconds
-POLL_INTERVAL = 0.05  # 50ms
-
 
 class RecordingService:
     """Main recording service that ties button events to camera control."""
@@ -39,13 +49,54 @@ class RecordingService:
             gpio_pin: GPIO pin for the latching button (BCM numbering)
             on_status: Optional callback for status messages (default: print)
         """
+        # Created once here; start_recording() relies on it existing so the
+        # button-press path skips the per-recording mkdir.
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-        self._status = on_status or print
-        self._running = False
-        self._proc: subprocess.Popen | None = None
+        self._emit = on_status or print
+        # Status lines go through a bounded queue drained by a dedicated
+        # writer thread: under systemd, journald backpressure can make
+        # print() block for milliseconds, and that must not stall the
+        # button or mux threads. On overflow the oldest line is dropped -
+        # the service prefers timeliness over log completeness.
+        self._log_q: queue.Queue[str | None] = queue.Queue(maxsize=256)
+        self._log_thread = threading.Thread(target=self._log_worker, name="log", daemon=True)
+        self._log_thread.start()
+        self._proc: subprocess.Popen | RecordingPipeline | BufferedRecording | None = None
         self._current_h264: Path | None = None
+        # Per-session sequence number in the filename: second-resolution
+        # timestamps alone can collide on a fast stop/start double-press.
+        self._seq = 0
+
+        # MP4 conversions run on a single background worker so button
+        # handling returns immediately instead of blocking for the remux.
+        # The worker drains its queue in batches: clips that pile up while
+        # a slow USB stick catches up get remuxed by one ffmpeg invocation.
+        self._mux_queue: queue.Queue[Path | None] = queue.Queue()
+        self._mux_thread = threading.Thread(target=self._mux_worker, name="mux", daemon=True)
+        self._mux_thread.start()
+
+        # Opt-in: mux straight to MP4 while recording (no .h264 on disk and
+        # no conversion step afterwards). The file-then-convert flow stays
+        # the default because a truncated fragmented MP4 is harder to rescue
+        # than a raw .h264 if power is lost mid-recording.
+        self._stream_mux = os.environ.get("SLITCAM_STREAM_MUX") == "1"
+
+        # Opt-in: route the stream through an in-process ring buffer so USB
+        # write stalls can't backpressure the encoder (SLITCAM_WRITE_BUFFER_MB).
+        # Direct-to-file stays the default for small-memory systems.
+        self._buffer_bytes = 0 if self._stream_mux else _write_buffer_bytes()
+
+        # Keep the Python service (and its mux worker) off the core that
+        # camera._pin_encoder reserves for rpicam-vid. Best-effort: pinning
+        # is disabled on macOS dev, small CPU counts, or permission errors.
+        encoder_cpu = _encoder_cpu()
+        if encoder_cpu is not None:
+            try:
+                os.sched_setaffinity(0, set(range(os.cpu_count() or 1)) - {encoder_cpu})
+            except OSError:
+                pass
 
         # Set up button with callbacks
         self._button = LatchingButton(
@@ -54,19 +105,50 @@ class RecordingService:
             on_released=self._on_button_released,
         )
 
+    def _status(self, message: str) -> None:
+        """Queue a status line for the log thread; never blocks the caller."""
+        try:
+            self._log_q.put_nowait(message)
+        except queue.Full:
+            try:
+                self._log_q.get_nowait()
+                self._log_q.put_nowait(message)
+            except (queue.Empty, queue.Full):
+                pass
+
+    def _log_worker(self) -> None:
+        """Drain queued status lines; the single consumer keeps ordering."""
+        while True:
+            message = self._log_q.get()
+            if message is None:
+                return
+            self._emit(message)
+
     def _on_button_pressed(self) -> None:
         """Called when button transitions to ON - start recording."""
         if self._proc is not None and self._proc.poll() is None:
             self._status("Already recording, ignoring press")
             return
 
-        # Generate timestamped filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self._current_h264 = self.output_dir / f"rec_{timestamp}.h264"
+        # Timestamped filename; time.strftime skips the datetime allocation
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        stem = f"rec_{timestamp}_{self._seq:03d}"
+        self._seq += 1
+        if self._stream_mux:
+            output = self.output_dir / f"{stem}.mp4"
+            self._current_h264 = None
+        else:
+            output = self.output_dir / f"{stem}.h264"
+            self._current_h264 = output
 
-        self._status(f"START -> {self._current_h264}")
+        self._status(f"START -> {output}")
         try:
-            self._proc = start_recording(self._current_h264)
+            if self._stream_mux:
+                self._proc = start_recording_mp4(output)
+            elif self._buffer_bytes:
+                self._proc = start_recording_buffered(output, buffer_bytes=self._buffer_bytes)
+            else:
+                self._proc = start_recording(output)
         except Exception as exc:
             self._status(f"ERROR starting recording: {exc}")
             self._proc = None
@@ -79,28 +161,59 @@ class RecordingService:
             return
 
         self._status("STOP...")
+        stop_ok = True
         try:
             stop_recording(self._proc)
         except Exception as exc:
+            # A buffered recording raises here when its flush failed
+            # (ENOSPC/yanked stick); the file is incomplete - don't remux it
+            stop_ok = False
             self._status(f"ERROR stopping recording: {exc}")
         finally:
             self._proc = None
 
-        # Convert to MP4
-        if self._current_h264 and self._current_h264.exists():
-            mp4_path = self._current_h264.with_suffix(".mp4")
-            self._status(f"MP4 -> {mp4_path}")
+        # Queue MP4 conversion on the background worker; the button thread
+        # must not block for the remux.
+        # The container (.mp4 or .mkv) depends on the conversion route, so
+        # log the source here and the actual result when the worker is done.
+        if stop_ok and self._current_h264 and self._current_h264.exists():
+            self._status(f"Conversion queued for {self._current_h264}")
+            self._mux_queue.put(self._current_h264)
+        self._current_h264 = None
+
+    # How long the mux worker waits for more clips before converting; long
+    # enough to coalesce a burst of short recordings, short enough to be
+    # invisible next to the remux itself.
+    _MUX_COALESCE_S = 0.5
+
+    def _mux_worker(self) -> None:
+        """Drain queued conversions, batching clips that arrive together."""
+        while True:
+            item = self._mux_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self._MUX_COALESCE_S
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._mux_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    # Re-post the shutdown sentinel so this batch still runs
+                    self._mux_queue.put(None)
+                    break
+                batch.append(nxt)
             try:
-                convert_to_mp4(self._current_h264, delete_h264=False)
+                out_paths = convert_many_to_mp4(batch)
             except Exception as exc:
                 self._status(f"ERROR converting to MP4: {exc}")
-        self._current_h264 = None
-
-    def _handle_shutdown(self, signum: int, frame) -> None:
-        """Handle SIGTERM/SIGINT for graceful shutdown."""
-        sig_name = signal.Signals(signum).name
-        self._status(f"\nReceived {sig_name}, shutting down...")
-        self._running = False
+            else:
+                for out_path in out_paths:
+                    self._status(f"Converted -> {out_path}")
 
     def run(self) -> int:
         """Run the recording service main loop.
@@ -108,9 +221,20 @@ class RecordingService:
         Returns:
             Exit code (0 for success)
         """
-        # Set up signal handlers for graceful shutdown
-        signal.signal(signal.SIGTERM, self._handle_shutdown)
-        signal.signal(signal.SIGINT, self._handle_shutdown)
+        # Shutdown signals arrive as fd events instead of Python handler
+        # dispatch: set_wakeup_fd writes the signal number into a pipe and
+        # the main loop blocks on it in select, so delivery can't interrupt
+        # a syscall mid-ffmpeg-launch. The handlers themselves are no-ops -
+        # they exist only so SIGTERM/SIGINT don't kill the process before
+        # the wakeup byte is read.
+        wake_r, wake_w = os.pipe()
+        os.set_blocking(wake_w, False)
+        old_wakeup_fd = signal.set_wakeup_fd(wake_w)
+        signal.signal(signal.SIGTERM, lambda *_: None)
+        signal.signal(signal.SIGINT, lambda *_: None)
+
+        selector = selectors.DefaultSelector()
+        selector.register(wake_r, selectors.EVENT_READ)
 
         self._status("Ready. Latching switch: ON=start, OFF=stop+mp4")
         self._status(f"Output directory: {self.output_dir}")
@@ -119,20 +243,36 @@ class RecordingService:
         if self._button.check_initial_state():
             self._status("Button was ON at startup, recording started")
 
-        self._running = True
         try:
-            while self._running:
-                self._button.poll()
-                time.sleep(POLL_INTERVAL)
+            # Button transitions arrive as gpiozero edge callbacks; block
+            # until a shutdown signal lands in the pipe (zero idle wake-ups).
+            selector.select()
+            pending = os.read(wake_r, 16)
+            if pending:
+                sig_name = signal.Signals(pending[0]).name
+                self._status(f"\nReceived {sig_name}, shutting down...")
         finally:
             # Clean up: stop any active recording
             if self._proc is not None and self._proc.poll() is None:
                 self._status("Stopping active recording...")
                 self._on_button_released()
 
+            # Let queued conversions finish before exiting
+            self._mux_queue.put(None)
+            self._mux_thread.join()
+
             self._button.close()
+
+            signal.set_wakeup_fd(old_wakeup_fd)
+            selector.close()
+            os.close(wake_r)
+            os.close(wake_w)
             self._status("Service stopped.")
 
+            # Flush remaining log lines, then stop the writer
+            self._log_q.put(None)
+            self._log_thread.join(timeout=1.0)
+
         return 0
 
 